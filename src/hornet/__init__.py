@@ -8,10 +8,11 @@ __license__ = 'MIT'
 
 import collections
 import copy
+import functools
 import numbers
 import pprint
 
-from .util import rpartial, foldr, install_symbols_module
+from .util import rpartial, install_symbols_module
 from .expressions import mcompose, promote, Name
 from .operators import rearrange
 from .dcg import _C_, expand
@@ -21,6 +22,7 @@ from .terms import (
     Atom,
     Atomic,
     Conditional,
+    Conjunction,
     Disjunction,
     Division,
     Environment,
@@ -46,6 +48,8 @@ from .terms import (
     Wildcard,
     build,
     is_empty,
+    rollback,
+    variable_names,
 )
 
 
@@ -79,6 +83,7 @@ system_names = [
     'reverse',
     'select',
     'smaller',
+    'table',
     'throw',
     'transpose',
     'true',
@@ -141,10 +146,47 @@ build_term = mcompose(build, rearrange)
 is_atomic = rpartial(isinstance, Atomic)
 
 
+def build_value(value):
+    if isinstance(value, (int, str)):
+        return _build_atomic_value(type(value), value)
+    return build_term(promote(value))
+
+
+# Terms built from ints and strings are ground and never mutated, so they can
+# be shared. The type is part of the key to keep e.g. 1 and True apart. Other
+# numbers aren't cached, since values like 0.0 and -0.0 or Decimal('1.0') and
+# Decimal('1.00') compare equal but aren't the same:
+@functools.lru_cache(maxsize=1024)
+def _build_atomic_value(value_type, value):
+    return build_term(promote(value))
+
+
+def head_keys(term):
+    head = term.head if isinstance(term, Structure) else term
+    if isinstance(head, Structure):
+        return tuple(each.ref.indicator for each in head.params)
+    else:
+        return ()
+
+
 class Clause:
+    __slots__ = 'term', 'variable_names', 'is_ground', 'head_keys'
 
     def __init__(self, term):
         self.term = term
+        self.variable_names = variable_names(term)
+        self.is_ground = not self.variable_names
+        self.head_keys = head_keys(term)
+
+    def may_match(self, goal):
+        # A cheap necessary condition for the head to unify with goal, checked
+        # before the clause gets copied:
+        for key, param in zip(self.head_keys, goal.params):
+            if key is not None:
+                indicator = param.ref.indicator
+                if indicator is not None and indicator is not key:
+                    return False
+        return True
 
     def __str__(self):
         return str(self.term)
@@ -154,6 +196,7 @@ class Clause:
 
 
 class Fact(Clause):
+    __slots__ = ()
 
     @property
     def name(self):
@@ -169,6 +212,7 @@ class Fact(Clause):
 
 
 class Rule(Clause):
+    __slots__ = ()
 
     @property
     def name(self):
@@ -187,13 +231,81 @@ def make_clause(term):
     return Rule(term) if isinstance(term, Implication) else Fact(term)
 
 
-class ClauseDict(collections.OrderedDict):
+def is_terminal(goal):
+    return (isinstance(goal, Relation) and goal.name == _C_.node.id and
+            len(goal.params) == 3 and not goal.actions)
+
+
+def fold_terminals(term):
+    """
+    A DCG rule whose body consists only of terminals 'C'(S0, T, S) gets
+    turned into a fact by unifying each S0 with [T|S] once, here, instead
+    of on every call.
+    """
+    if not isinstance(term, Implication):
+        return term
+    head = term.head
+    if not isinstance(head, Relation) or head.actions:
+        return term
+    goals = []
+    body = term.body.ref
+    while isinstance(body, Conjunction):
+        goals.append(body.left.ref)
+        body = body.right.ref
+    goals.append(body)
+    if not all(map(is_terminal, goals)):
+        return term
+    trail = []
+    try:
+        for goal in goals:
+            S0, T, S = goal.params
+            unify(S0, List(env=goal.env, params=(T, S)), trail)
+    except UnificationFailed:
+        rollback(trail)
+        return term
+    return copy.deepcopy(head)
+
+
+class ClauseDict(dict):
 
     def __missing__(self, key):
         value = self[key] = []
         return value
 
 
+class ClauseIndex:
+
+    """
+    A first argument index over the clauses of one predicate. Each bucket
+    holds, in database order, the clauses whose head's first argument has a
+    given indicator together with those whose first argument is unbound.
+    """
+
+    __slots__ = 'unindexed', 'buckets'
+
+    def __init__(self, clauses=()):
+        self.unindexed = []
+        self.buckets = {}
+        for clause in clauses:
+            self.add(clause)
+
+    def add(self, clause):
+        key = clause.term.head.index_key
+        if key is None:
+            self.unindexed.append(clause)
+            for bucket in self.buckets.values():
+                bucket.append(clause)
+        else:
+            try:
+                bucket = self.buckets[key]
+            except KeyError:
+                bucket = self.buckets[key] = list(self.unindexed)
+            bucket.append(clause)
+
+    def get(self, key):
+        return self.buckets.get(key, self.unindexed)
+
+
 def pyfunc(fn):
     def caller(term, env, db, trail):
         fn(*(each.ref for each in term.params))
@@ -217,15 +329,13 @@ def print_trail(term, env, db, trail):
 
 
 def make_list(env, items, tail=EMPTY):
-
-    def cons(*params):
-        return List(env=env, params=params)
-
-    return foldr(cons, items, tail)
+    for item in reversed(items):
+        tail = List(env=env, params=(item, tail))
+    return tail
 
 
 class TailPair(Adjunction):
-    pass
+    __slots__ = ()
 
 
 def expect(item, expected_type):
@@ -246,18 +356,21 @@ def _writeln(term, env, db, trail):
 
 
 def _findall_3(term, env, db, trail):
-    results = [copy.deepcopy(env.Object.ref) for _ in env.Goal.resolve(db)]
+    obj = env('Object')
+    results = [copy.deepcopy(obj.ref) for _ in env.Goal.resolve(db)]
     unify(env.List, make_list(env, results), trail)
 
 
 def _findall_4(term, env, db, trail):
-    results = [copy.deepcopy(env.Object) for _ in env.Goal.resolve(db)]
+    obj = env('Object')
+    results = [copy.deepcopy(obj.ref) for _ in env.Goal.resolve(db)]
     unify(env.List, make_list(env, results, env.Rest), trail)
 
 
 def _listing_0(term, env, db, trail):
-    for each in db.items():
-        _listing(*each)
+    for indicator, clauses in db.items():
+        if not is_reserved(indicator.functor):
+            _listing(indicator, clauses)
 
 
 def _listing_1(term, env, db, trail):
@@ -273,11 +386,25 @@ def _listing_2(term, env, db, trail):
     _listing(indicator, db.get(indicator))
 
 
+def predicate_indicator(term):
+    term = term.ref
+    if not (isinstance(term, Division) and
+            isinstance(term.left.ref, Atom) and
+            isinstance(term.right.ref, Number)):
+        raise TypeError(
+            f"Predicate indicator '{term}' must be of the form name/arity.")
+    return Indicator(term.left.ref.name, term.right.ref.name)
+
+
+def _table(term, env, db, trail):
+    db.tables.setdefault(predicate_indicator(env.P), {})
+
+
 def _listing(indicator, clauses):
-    print(indicator)
-    for clause in clauses:
-        print(f'    {clause}.')
-    print()
+    lines = [str(indicator)]
+    lines.extend(f'    {clause}.' for clause in clauses)
+    lines.append('')
+    print('\n'.join(lines))
 
 
 def _smaller(term, env, db, trail):
@@ -290,8 +417,25 @@ def _greater(term, env, db, trail):
         raise UnificationFailed
 
 
+def evaluate(term):
+    # an unbound variable would evaluate to None, which compares equal to None:
+    if isinstance(term, (Variable, Wildcard)):
+        raise TypeError(f'Expected arithmetic expression, found unbound {term}.')
+    return term()
+
+
+def _arithmetic_equal(term, env, db, trail):
+    if not evaluate(env.X) == evaluate(env.Y):
+        raise UnificationFailed
+
+
+def _arithmetic_not_equal(term, env, db, trail):
+    if evaluate(env.X) == evaluate(env.Y):
+        raise UnificationFailed
+
+
 def _let(term, env, db, trail):
-    unify(env.X, build_term(promote(env.Y())), trail)
+    unify(env.X, build_value(env.Y()), trail)
 
 
 def _atomic(term, env, db, trail):
@@ -300,18 +444,25 @@ def _atomic(term, env, db, trail):
 
 
 def _integer(term, env, db, trail):
-    expect(env.X, Number)
-    expect(env.X(), int)
+    X = env.X
+    expect(X, Number)
+    expect(X(), int)
 
 
 def _real(term, env, db, trail):
-    expect(env.X, Number)
-    expect(env.X(), float)
+    X = env.X
+    expect(X, Number)
+    expect(X(), float)
 
 
 def _numeric(term, env, db, trail):
-    expect(env.X, Number)
-    expect(env.X(), numbers.Number)
+    X = env.X
+    expect(X, Number)
+    expect(X(), numbers.Number)
+
+
+def is_reserved(name):
+    return name.startswith('$')
 
 
 def flatten(L):
@@ -319,8 +470,9 @@ def flatten(L):
         return []
     elif isinstance(L, List):
         acc = []
+        append = acc.append
         while isinstance(L, List):
-            acc.append(L.car.ref)
+            append(L.car.ref)
             L = L.cdr.ref
         if not is_empty(L):
             acc[-1] = TailPair(env=L.env, name='|', params=[acc[-1], L])
@@ -329,21 +481,47 @@ def flatten(L):
         raise TypeError(f'Expected List or EmptyList, found {type(L)}: {L}.')
 
 
+def proper_list_items(L):
+    if not isinstance(L, (List, EmptyList)):
+        raise UnificationFailed
+    items = flatten(L)
+    if items and isinstance(items[-1], TailPair):
+        raise UnificationFailed
+    return items
+
+
+# If the first argument of append/3, reverse/2 or length/2 is a proper list,
+# there is exactly one answer, which can be computed in one go instead of by
+# one resolution step per list element. Its result gets unified only after the
+# cut, so that a mismatch doesn't fall back to the step-by-step clauses:
+
+def _append_proper(term, env, db, trail):
+    unify(env.C, make_list(env, proper_list_items(env.A), env.B), trail)
+
+
+def _reverse_proper(term, env, db, trail):
+    unify(env.Y, make_list(env, proper_list_items(env.X)[::-1]), trail)
+
+
+def _length_proper(term, env, db, trail):
+    unify(env.N, build_value(len(proper_list_items(env.L))), trail)
+
+
 def flatten_strs(L):
-    try:
-        for each in flatten(L):
-            expect(each, String)
-            yield each.ref()
-    except UnificationFailed:
-        raise TypeError(f'Expected String, found {type(each)}: {each}')  # pyright: ignore[reportUnboundVariable]
+    strs = []
+    for each in flatten(L):
+        if not isinstance(each, String):
+            raise TypeError(f'Expected String, found {type(each)}: {each}')
+        strs.append(each())
+    return strs
 
 
 def _join_2(term, env, db, trail):
-    unify(env.S, build_term(promote(''.join(flatten_strs(env.L)))), trail)
+    unify(env.S, build_value(''.join(flatten_strs(env.L))), trail)
 
 
 def _join_3(term, env, db, trail):
-    unify(env.S, build_term(promote(env.T().join(flatten_strs(env.L)))), trail)
+    unify(env.S, build_value(env.T().join(flatten_strs(env.L))), trail)
 
 
 def _var(term, env, db, trail):
@@ -356,30 +534,33 @@ def _nonvar(term, env, db, trail):
 
 def _univ(term, env, db, trail):
 
-    if isinstance(env.T, Relation):
-        params = make_list(env, env.T.params)
-        result = make_list(env, [Atom(env=env, name=env.T.name)], params)  # pyright: ignore[reportGeneralTypeIssues]
+    T = env.T
+    L = env.L
 
-        unify(env.L, result, trail)
+    if isinstance(T, Relation):
+        functor = Atom(env=env, name=T.name)
+        result = List(env=env, params=(functor, make_list(env, T.params)))
+        unify(L, result, trail)
 
-    elif isinstance(env.T, Atom):
-        result = make_list(env, [Atom(env=env, name=env.T.name)])
-        unify(env.L, result, trail)
+    elif isinstance(T, Atom):
+        result = List(env=env, params=(Atom(env=env, name=T.name), EMPTY))
+        unify(L, result, trail)
 
-    elif isinstance(env.L, List):
-        functor = env.L.car.ref
+    elif isinstance(L, List):
+        functor = L.car.ref
         if not isinstance(functor, Atom):
             raise TypeError(
                 f'First Element of List must be Atom, not {type(functor)}: {functor}'
             )
-        if isinstance(env.L.cdr.ref, EmptyList):
-            unify(env.T, Atom(env=env, name=functor.name), trail)
+        rest = L.cdr.ref
+        if isinstance(rest, EmptyList):
+            unify(T, Atom(env=env, name=functor.name), trail)
         else:
-            params = flatten(env.L.cdr.ref)
+            params = flatten(rest)
             if isinstance(params[-1], TailPair):
-                raise TypeError(f'Proper List expected, found {env.L}')
+                raise TypeError(f'Proper List expected, found {L}')
             result = Relation(env=env, name=functor.name, params=params)
-            unify(env.T, result, trail)
+            unify(T, result, trail)
 
     else:
         raise UnificationFailed
@@ -405,7 +586,14 @@ def _bootstrap():
 
     from .symbols import P, Q, X, Y, Z, Object, Goal, List, Rest  # pyright: ignore[reportMissingImports]
     from .symbols import Predicate, A, B, C, D, H, L, T, S, Arity, G, G1  # pyright: ignore[reportMissingImports]
-    from .symbols import M, N, length_is_N  # pyright: ignore[reportMissingImports]
+    from .symbols import M, N, R, length_is_N  # pyright: ignore[reportMissingImports]
+
+    # helper predicates get reserved names, which can't clash with user
+    # predicates and are left out of listing:
+    append_proper = Name('$append_proper')
+    append_partial = Name('$append_partial')
+    reverse_proper = Name('$reverse_proper')
+    length_proper = Name('$length_proper')
 
     expressions = (
 
@@ -460,11 +648,19 @@ def _bootstrap():
         member(H, [H | T]),  # pyright: ignore[reportUndefinedVariable]
         member(G, [H | T]) << member(G, T),  # pyright: ignore[reportUndefinedVariable]
 
-        append([], A, A),  # pyright: ignore[reportUndefinedVariable]
-        append([A | B], C, [A | D]) << append(B, C, D),  # pyright: ignore[reportUndefinedVariable]
+        append(A, B, C) << append_proper(A, B, R) & cut & equal(R, C),  # pyright: ignore[reportUndefinedVariable]
+        append(A, B, C) << append_partial(A, B, C),  # pyright: ignore[reportUndefinedVariable]
+
+        append_proper(A, B, C)[_append_proper],  # pyright: ignore[reportUndefinedVariable]
 
+        append_partial([], A, A),  # pyright: ignore[reportUndefinedVariable]
+        append_partial([A | B], C, [A | D]) << append_partial(B, C, D),  # pyright: ignore[reportUndefinedVariable]
+
+        reverse(X, Y) << reverse_proper(X, R) & cut & equal(R, Y),  # pyright: ignore[reportUndefinedVariable]
         reverse(X, Y) << reverse(X, [], Y),  # pyright: ignore[reportUndefinedVariable]
 
+        reverse_proper(X, Y)[_reverse_proper],  # pyright: ignore[reportUndefinedVariable]
+
         reverse([], Y, Y),  # pyright: ignore[reportUndefinedVariable]
         reverse([X | P], Q, Y) << reverse(P, [X | Q], Y),  # pyright: ignore[reportUndefinedVariable]
 
@@ -486,6 +682,8 @@ def _bootstrap():
 
         listing(Predicate, Arity)[_listing_2],  # pyright: ignore[reportUndefinedVariable]
 
+        table(P)[_table],  # pyright: ignore[reportUndefinedVariable]
+
         _C_([X | L], X, L),  # pyright: ignore[reportUndefinedVariable]
 
         atomic(X)[_atomic],  # pyright: ignore[reportUndefinedVariable]
@@ -506,10 +704,9 @@ def _bootstrap():
 
         univ(T, L)[_univ],  # pyright: ignore[reportUndefinedVariable]
 
-        arithmetic_equal(X, Y) << let(Z, X) & let(Z, Y),  # pyright: ignore[reportUndefinedVariable]
+        arithmetic_equal(X, Y)[_arithmetic_equal],  # pyright: ignore[reportUndefinedVariable]
 
-        arithmetic_not_equal(X, Y) << let(Z, X) & let(Z, Y) & cut[_fail],  # pyright: ignore[reportUndefinedVariable]
-        arithmetic_not_equal(_, _),  # pyright: ignore[reportUndefinedVariable]
+        arithmetic_not_equal(X, Y)[_arithmetic_not_equal],  # pyright: ignore[reportUndefinedVariable]
 
         transpose(L, T)[_transpose],  # pyright: ignore[reportUndefinedVariable]
 
@@ -517,12 +714,15 @@ def _bootstrap():
         maplist(_, []),  # pyright: ignore[reportUndefinedVariable]
 
         length(L, N) << nonvar(N) & cut & ~smaller(N, 0) & length_is_N(L, N),  # pyright: ignore[reportUndefinedVariable]
+        length(L, N) << length_proper(L, R) & cut & equal(R, N),  # pyright: ignore[reportUndefinedVariable]
         length([], 0),  # pyright: ignore[reportUndefinedVariable]
         length([H | T], N) << length(T, M) & let(N, M + 1),  # pyright: ignore[reportUndefinedVariable]
 
         length_is_N([], 0) << cut,  # pyright: ignore[reportUndefinedVariable]
         length_is_N([H | T], N) << let(M, N - 1) & length_is_N(T, M),  # pyright: ignore[reportUndefinedVariable]
 
+        length_proper(L, N)[_length_proper],  # pyright: ignore[reportUndefinedVariable]
+
     )
 
     db = ClauseDict()
@@ -547,24 +747,54 @@ class Database(ClauseDict):
     def __init__(self):
         super().__init__(_system_db)
         self.indicators = collections.defaultdict(set, _indicators)
+        self.indexes = {}
+        self.tables = {}
+        self.table_stack = []
 
     def tell(self, *expressions):
         clauses = []
         for expression in expressions:
-            clause = make_clause(expand_term(expression))
+            clause = make_clause(fold_terminals(expand_term(expression)))
             if not clause.is_assertable:
                 raise TypeError(
                     f"Clause '{clause}' of type {type(clause.term)} cannot be asserted into database.")
             clauses.append(clause)
         for clause in clauses:
             self[clause.indicator].append(clause)
-            self.indicators[clause.name].add(clause.indicator)  # pyright: ignore[reportGeneralTypeIssues]
+            indicators = self.indicators[clause.name]
+            if isinstance(indicators, frozenset):
+                # the indicators of system predicates are shared by all
+                # databases, so they get copied on the first write:
+                indicators = self.indicators[clause.name] = set(indicators)
+            indicators.add(clause.indicator)
+            if clause.indicator in self.indexes:
+                self.indexes[clause.indicator].add(clause)
+        for table in self.tables.values():
+            table.clear()
+
+    def table(self, *expressions):
+        """
+        Table the predicates given as name/arity, so that the answers to each
+        variant of a call are computed only once, until the next tell(). Calls
+        of a variant while its answers are being computed don't recurse, so
+        e.g. left recursion terminates.
+        """
+        for expression in expressions:
+            indicator = predicate_indicator(build_term(expression))
+            self.tables.setdefault(indicator, {})
 
     def ask(self, expression):
         return build_term(expression).resolve(self)
 
-    def find_all(self, indicator):
-        return self.get(indicator, ())
+    def find_all(self, indicator, key=None):
+        clauses = self.get(indicator, ())
+        if key is None or not clauses:
+            return clauses
+        try:
+            index = self.indexes[indicator]
+        except KeyError:
+            index = self.indexes[indicator] = ClauseIndex(clauses)
+        return index.get(key)
 
 from . import _version
 __version__ = _version.get_versions()['version']
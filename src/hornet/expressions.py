@@ -12,9 +12,9 @@ import ast
 import functools
 import numbers
 
-from toolz.functoolz import compose, flip, identity
+from toolz.functoolz import identity
 
-from .util import foldl, rpartial, qualname
+from .util import compose, flip, rpartial, qualname
 
 
 __all__ = [
@@ -118,7 +118,7 @@ def mcompose(*mfuncs):
     """
     Make monadic functions AST --> Expression composable.
     """
-    return functools.partial(foldl, bind, tuple(reversed(mfuncs)))
+    return functools.partial(functools.reduce, bind, tuple(reversed(mfuncs)))
 
 
 # Here come the Expression factory functions.
@@ -163,6 +163,30 @@ class AstWrapper(ast.AST):
     pass
 
 
+class NodeVisitor(ast.NodeVisitor):
+
+    """
+    An ast.NodeVisitor that looks up the visitor method for a node type only
+    once per class instead of once per visited node.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.visitors = {}
+
+    def visit(self, node):
+        node_type = type(node)
+        try:
+            visitor = self.visitors[node_type]
+        except KeyError:
+            visitor = self.visitors[node_type] = getattr(
+                type(self),
+                'visit_' + node_type.__name__,
+                type(self).generic_visit,
+            )
+        return visitor(self, node)
+
+
 @mlift
 def Wrapper(wrapped):
     return AstWrapper(wrapped=wrapped)
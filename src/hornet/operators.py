@@ -11,11 +11,11 @@ import numbers
 import operator
 from dataclasses import dataclass
 
-from toolz.functoolz import compose, curry, identity
+from toolz.functoolz import curry, identity
 
-from .util import pairwise, const, decrement
+from .util import compose, pairwise, const, decrement
 from .expressions import is_name, is_operator, is_tuple, is_astwrapper
-from .expressions import mlift, promote, Expression
+from .expressions import mlift, promote, Expression, NodeVisitor
 
 
 # The following parser is based on the paper "Top Down Operator Precedence" 
@@ -179,7 +179,7 @@ unaryop_fields = operator.attrgetter('op', 'operand')
 binop_fields = operator.attrgetter('left', 'op', 'right')
 
 
-class ASTFlattener(ast.NodeVisitor):
+class ASTFlattener(NodeVisitor):
 
     def __init__(self, nodes):
         self.node = nodes
@@ -6,26 +6,28 @@ __author__ = 'Mick Krippendorf <m.krippendorf@freenet.de>'
 __license__ = 'MIT'
 
 
-from functools import wraps
+from functools import partial, wraps
 
 
 def trampoline(bounce, *args, **kwargs):
+    bounce = partial(bounce, *args, **kwargs)
     while bounce:
-        result, bounce, args, kwargs = bounce(*args, **kwargs)
-        yield from result
+        result, bounce = bounce()
+        if result:
+            yield from result
 
 def tailcall(function):
     @wraps(function)
     def launch(*args, **kwargs):
-        return (), function, args, kwargs
+        return (), partial(function, *args, **kwargs)
     return launch
 
 
 def emit(*values):
     def emitter(cont, *args, **kwargs):
-        return values, cont, args, kwargs
+        return values, partial(cont, *args, **kwargs)
     return emitter
 
 
 def abort(*args, **kwargs):
-    return (), None, args, kwargs
+    return (), None
@@ -13,13 +13,14 @@ import dataclasses
 import numbers
 import operator
 import string
+import weakref
 
-from toolz.functoolz import compose, identity
+from toolz.functoolz import identity
 
 from .tailcalls import tailcall, trampoline, emit as success, abort as failure
-from .util import noop, foldr, rpartial, tabulate, const
+from .util import noop, compose, foldr, rpartial, tabulate, const
 from .util import first_arg as get_self
-from .expressions import is_bitor, is_name
+from .expressions import is_bitor, is_name, NodeVisitor
 from .operators import make_token, fz, xfx, xfy, yfx
 
 
@@ -54,6 +55,9 @@ __all__ = [
     'Negative',
     'Builder',
     'is_empty',
+    'variable_names',
+    'variant_key',
+    'TabledVariant',
     'Environment',
     'build',
 ]
@@ -87,13 +91,35 @@ parenthesized = '({})'.format
 
 
 def comma_separated(items):
-    return ', '.join(str(each) for each in items)
+    return ', '.join(map(str, items))
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, order=True)
 class Indicator:
     functor: str
     arity: int
+    _hash: int = dataclasses.field(init=False, repr=False, compare=False)
+
+    # Indicators key the clause database and get hashed on every lookup, so
+    # the hash is computed only once:
+    def __post_init__(self):
+        object.__setattr__(self, '_hash', hash((self.functor, self.arity)))
+
+    def __hash__(self):
+        return self._hash
+
+
+# Indicators of terms are interned, so that equal indicators are identical as
+# long as any of them is alive:
+_indicators = weakref.WeakValueDictionary()
+
+
+def interned_indicator(functor, arity):
+    key = functor, arity
+    indicator = _indicators.get(key)
+    if indicator is None:
+        indicator = _indicators[key] = Indicator(functor, arity)
+    return indicator
 
 
 class UnificationFailed(Exception):
@@ -107,6 +133,7 @@ class Wildcard:
     __deepcopy__ = get_self
     fresh = get_self
     ref = property(identity)
+    indicator = None
     unify = noop
     unify_variable = noop
     unify_structure = noop
@@ -115,33 +142,36 @@ class Wildcard:
 WILDCARD = Wildcard()
 
 
-class Variable(collections.Counter):
+class Variable(set):
     __slots__ = 'env', 'name'
     __eq__ = object.__eq__  # type: ignore
     __hash__ = object.__hash__  # type: ignore
+    indicator = None
 
     def __init__(self, *, env, name):
         self.env = env
         self.name = name
 
     def __call__(self):
-        return None if self.ref is self else self.ref()
+        ref = self.ref
+        return None if ref is self else ref()
 
     def __repr__(self):
-        if self.ref is self:
+        ref = self.ref
+        if ref is self:
             return min(
                 variable.name
                 for variable in self.aliases()
                 if variable.env is self.env
             )
         else:
-            return str(self.ref)
+            return str(ref)
 
     def __deepcopy__(self, memo, deepcopy=copy.deepcopy):
         var = deepcopy(self.env, memo)(self.name)
         if self and not var:
             memo[id(self)] = var
-            var.update((deepcopy(k, memo), v) for k, v in self.items())
+            var.update(deepcopy(alias, memo) for alias in self)
         return var
 
     def fresh(self, env):
@@ -149,11 +179,11 @@ class Variable(collections.Counter):
 
     def aliases(self):
         seen = {self}
-        todo = self.keys() - seen
+        todo = self - seen
         while todo:
             alias = todo.pop()
             seen.add(alias)
-            todo |= alias.keys() - seen
+            todo |= alias - seen
         return seen
 
     @property
@@ -169,27 +199,38 @@ class Variable(collections.Counter):
 
     def unify_variable(self, other, trail):
 
-        self[other] += 1
-        other[self] += 1
+        if other in self:
+            return
 
-        @trail.append
-        def rollback_unify_variable(self=self, other=other):
-            self[other] -= 1
-            other[self] -= 1
-            if self[other] < 1:
-                del self[other]
-                del other[self]
+        self.add(other)
+        other.add(self)
+        trail.append((unlink, self, other))
 
     def unify_structure(self, structure, trail):
 
         variables = self.aliases()
         for variable in variables:
             variable.ref = structure
+        trail.append((unbind, variables, None))
+
 
-        @trail.append
-        def rollback_unify_structure(variables=variables):
-            for variable in variables:
-                variable.ref = variable
+# The trail is a list of (undo, this, that) records. Rolling it back calls
+# undo(this, that) for each record, most recent first:
+
+def unlink(this, that):
+    this.discard(that)
+    that.discard(this)
+
+
+def unbind(variables, _):
+    for variable in variables:
+        variable.ref = variable
+
+
+def rollback(trail):
+    while trail:
+        undo, this, that = trail.pop()
+        undo(this, that)
 
 
 def is_cut(term):
@@ -197,28 +238,41 @@ def is_cut(term):
 
 
 class Structure:
-    __slots__ = 'env', 'name', 'params', 'actions'
-    ref = property(identity)
-    head = property(get_self)
-    body = property(noop)
+    __slots__ = (
+        'env', 'name', 'params', 'actions', 'indicator', 'ref', 'head', 'body',
+    )
 
+    # Two terms can only unify if their indicators are equal, so the indicator
+    # of the first argument is used to index clauses. It is None if the first
+    # argument is unbound and can match anything:
     @property
-    def indicator(self):
-        return Indicator(self.name, len(self.params))
+    def index_key(self):
+        return self.params[0].ref.indicator if self.params else None
 
     def __init__(self, *, env, name, params=(), actions=()):
         self.env = env
         self.name = name
         self.params = tuple(params)
         self.actions = list(actions)
-
+        self.indicator = interned_indicator(name, len(self.params))
+        self.ref = self
+        self.head = self
+        self.body = None
+
+    # Params are copied by calling their __deepcopy__() directly, which skips
+    # the generic dispatch of copy.deepcopy(). The memo is still looked up and
+    # filled here, so that a structure shared by several params, e.g. through
+    # variables bound to it, gets copied only once:
     def __deepcopy__(self, memo, deepcopy=copy.deepcopy):
-        return type(self)(
-            env=deepcopy(self.env, memo),
-            name=self.name,
-            params=[deepcopy(each.ref, memo) for each in self.params],
-            actions=self.actions,
-        )
+        structure = memo.get(id(self))
+        if structure is None:
+            structure = memo[id(self)] = type(self)(
+                env=deepcopy(self.env, memo),
+                name=self.name,
+                params=[each.ref.__deepcopy__(memo) for each in self.params],
+                actions=self.actions,
+            )
+        return structure
 
     def fresh(self, env):
         return type(self)(
@@ -241,18 +295,39 @@ class Structure:
     def unify_structure(self, other, trail):
         if not isinstance(self, type(other)):
             raise UnificationFailed
-        elif self.indicator != other.indicator:
+        elif self.indicator is not other.indicator:
             raise UnificationFailed
         elif self.params:
             for this, that in zip(self.params, other.params):
                 this.ref.unify(that.ref, trail)
 
     def choice_point(self, db):
+        table = db.tables.get(self.indicator)
+        if table is None or self.actions:
+            return self.clause_choice_point(db)
+        key = variant_key(self)
+        try:
+            variant = table[key]
+        except KeyError:
+            variant = table[key] = TabledVariant()
+        if variant.resolving:
+            # this is the copy of the goal whose answers are being computed:
+            variant.resolving = False
+            return self.clause_choice_point(db)
+        else:
+            return self.tabled_choice_point(db, variant)
+
+    def clause_choice_point(self, db):
         trail = []
-        for clause in db.find_all(self.indicator):
-            env = Environment()
-            term = clause.term.fresh(env)
-            env.rename_vars()
+        for clause in db.find_all(self.indicator, self.index_key):
+            if not clause.may_match(self):
+                continue
+            if clause.is_ground:
+                # a fresh copy of a ground clause would be identical to it:
+                term = clause.term
+            else:
+                env = Environment.fresh(clause.variable_names)
+                term = clause.term.fresh(env)
             try:
                 term.head.unify(self, trail)
                 term.head.action(db, trail)
@@ -262,8 +337,27 @@ class Structure:
             else:
                 yield term.body
             finally:
-                while trail:
-                    trail.pop()()
+                rollback(trail)
+
+    def tabled_choice_point(self, db, variant):
+        # Answers to a tabled goal are computed once per variant of the goal
+        # and then replayed like facts. A variant that gets called while its
+        # answers are still being computed replays the answers found so far,
+        # including those found while replaying:
+        if variant.position is not None:
+            variant.called_from(db.table_stack)
+        elif not variant.complete:
+            variant.evaluate(self, db)
+        trail = []
+        for answer in variant.answers:
+            try:
+                self.unify(copy.deepcopy(answer), trail)
+            except UnificationFailed:
+                pass
+            else:
+                yield None
+            finally:
+                rollback(trail)
 
     def resolve(self, db):
         return trampoline(
@@ -346,21 +440,135 @@ EMPTY = EmptyList()
 is_empty = rpartial(isinstance, EmptyList)
 
 
+def variable_names(term):
+    names = {}
+    todo = [term]
+    while todo:
+        term = todo.pop().ref
+        if isinstance(term, Variable):
+            names[term.name] = None
+        elif isinstance(term, Structure):
+            todo.extend(reversed(term.params))
+    return tuple(names)
+
+
+def variant_key(term):
+    """
+    Two terms have equal keys iff they are equal up to a consistent renaming of
+    their unbound variables.
+    """
+    var_numbers = {}
+    next_number = 0
+    key = []
+    todo = [term]
+    while todo:
+        term = todo.pop().ref
+        if isinstance(term, Variable):
+            number = var_numbers.get(term)
+            if number is None:
+                number = next_number
+                next_number += 1
+                var_numbers.update(dict.fromkeys(term.aliases(), number))
+            key.append(number)
+        elif isinstance(term, Atomic):
+            # the type of the name keeps apart numbers that compare equal, like
+            # 1, 1.0 and True:
+            key.append((type(term), type(term.name), term.name))
+        elif isinstance(term, Structure):
+            key.append((type(term), term.name, len(term.params)))
+            todo.extend(reversed(term.params))
+        else:
+            key.append(None)
+    return tuple(key)
+
+
+class TabledVariant:
+
+    """
+    The answers to one variant of a tabled goal. They are computed by
+    resolving a copy of the goal against the clauses over and over, until no
+    new answers turn up. A variant that calls another variant still being
+    computed further up depends on it: it gets recomputed on each round of
+    that other variant and is complete only when that one is.
+    """
+
+    __slots__ = (
+        'answers', 'keys', 'complete', 'resolving', 'position', 'leader',
+        'members',
+    )
+
+    def __init__(self):
+        self.answers = []
+        self.keys = set()
+        self.complete = False
+        # resolving is set right before a copy of the goal gets resolved, so
+        # that the first call of the variant, which is the one of the copy
+        # itself, goes to the clauses. Copies of atoms are the atoms
+        # themselves, so the copy can't be told apart from other calls by
+        # identity:
+        self.resolving = False
+        # while the answers are computed, position is the index of the variant
+        # on db.table_stack and leader the lowest position of any variant it
+        # depends on:
+        self.position = None
+        self.leader = None
+        # the variants that depend on this one and get completed with it:
+        self.members = set()
+
+    def count(self):
+        return len(self.answers) + sum(
+            len(each.answers) for each in self.members)
+
+    def called_from(self, stack):
+        for each in stack[self.position + 1:]:
+            each.leader = min(each.leader, self.position)
+
+    def evaluate(self, goal, db):
+        stack = db.table_stack
+        position = self.position = self.leader = len(stack)
+        goal = copy.deepcopy(goal)
+        stack.append(self)
+        try:
+            while True:
+                count = self.count()
+                self.resolving = True
+                for _ in goal.resolve(db):
+                    answer = copy.deepcopy(goal)
+                    key = variant_key(answer)
+                    if key not in self.keys:
+                        self.keys.add(key)
+                        self.answers.append(answer)
+                if self.leader < position or self.count() == count:
+                    break
+        finally:
+            stack.pop()
+            self.resolving = False
+            self.position = None
+        members, self.members = self.members, set()
+        members.add(self)
+        if self.leader < position:
+            stack[-1].members |= members
+        else:
+            for each in members:
+                each.complete = True
+
+
 class Relation(Structure):
     __slots__ = ()
     __call__ = get_name
 
     def __repr__(self):
-        return f'{self.name}({comma_separated(str(each.ref) for each in self.params)})'
+        params = comma_separated(each.ref for each in self.params)
+        return f'{self.name}({params})'
 
 
 class List(Structure):
-    __slots__ = ()
-    car = first_param
-    cdr = second_param
+    __slots__ = 'car', 'cdr'
 
-    def __init__(self, **kwargs):
-        Structure.__init__(self, name='.', **kwargs)
+    def __init__(self, *, env, params=(), actions=()):
+        Structure.__init__(
+            self, env=env, name='.', params=params, actions=actions)
+        self.car, self.cdr = self.params
 
     def __call__(self):
         acc = []
@@ -380,10 +588,13 @@ class List(Structure):
             return f'[{comma_separated(acc)}|{self}]'
 
     def __deepcopy__(self, memo, deepcopy=copy.deepcopy):
-        return List(
-            env=deepcopy(self.env, memo),
-            params=[deepcopy(each.ref, memo) for each in self.params],
-            actions=self.actions)
+        structure = memo.get(id(self))
+        if structure is None:
+            structure = memo[id(self)] = List(
+                env=deepcopy(self.env, memo),
+                params=[each.ref.__deepcopy__(memo) for each in self.params],
+                actions=self.actions)
+        return structure
 
     def fresh(self, env):
         return List(
@@ -391,6 +602,22 @@ class List(Structure):
             params=[each.fresh(env) for each in self.params],
             actions=self.actions)
 
+    def unify_structure(self, other, trail):
+        if not isinstance(other, List):
+            Structure.unify_structure(self, other, trail)
+            return
+        # walk down both lists instead of recursing into their tails, so that
+        # the stack doesn't grow with the length of the lists:
+        while True:
+            self.car.ref.unify(other.car.ref, trail)
+            this = self.cdr.ref
+            that = other.cdr.ref
+            if isinstance(this, List) and isinstance(that, List):
+                self, other = this, that
+            else:
+                this.unify(that, trail)
+                return
+
 
 class PrefixOperator(Structure):
     __slots__ = ()
@@ -443,8 +670,11 @@ class InfixOperator(Structure):
 
 class Implication(InfixOperator):
     __slots__ = ()
-    head = first_param
-    body = second_param
+
+    def __init__(self, *, env, name, params=(), actions=()):
+        InfixOperator.__init__(
+            self, env=env, name=name, params=params, actions=actions)
+        self.head, self.body = self.params
 
     # reverse implication: l << r
     def op(left, right):
@@ -554,6 +784,7 @@ var_suffix_map = collections.defaultdict(lambda: tabulate('_{:02X}?'.format))
 
 
 class Environment(dict):
+    __slots__ = ()
 
     def __call__(self, name):
         try:
@@ -569,11 +800,16 @@ class Environment(dict):
         env = memo[id(self)] = Environment()
         return env
 
-    def rename_vars(self):
-        for variable in list(self.values()):
-            if isinstance(variable, Variable):
-                variable.name += next(var_suffix_map[variable.name])
-                self[variable.name] = variable
+    @classmethod
+    def fresh(cls, names):
+        # Each variable is found under its original name, for Variable.fresh()
+        # and actions, and under its new, unique name, for Variable.ref:
+        env = cls()
+        for name in names:
+            unique_name = name + next(var_suffix_map[name])
+            variable = Variable(env=env, name=unique_name)
+            env[name] = env[variable.name] = variable
+        return env
 
     @property
     class proxy(collections.ChainMap):
@@ -610,7 +846,7 @@ def visit_op(op_class, op_name):
     return visit
 
 
-class Builder(ast.NodeVisitor):
+class Builder(NodeVisitor):
 
     def __init__(self, env):
         self.env = env
@@ -6,11 +6,11 @@ __author__ = 'Mick Krippendorf <m.krippendorf@freenet.de>'
 __license__ = 'MIT'
 
 
-from functools import partial, reduce as foldl
-from itertools import count, tee, zip_longest
+from functools import partial
+from itertools import chain, count, pairwise as _pairwise
 
 
-from toolz.functoolz import flip
+from toolz.functoolz import identity
 
 
 decrement = (-1).__add__
@@ -25,6 +25,13 @@ def const(x):
     return lambda _: x
 
 
+def flip(func):
+    "flip(f)(a, b) == f(b, a)"
+    def flipped(a, b):
+        return func(b, a)
+    return flipped
+
+
 def first_arg(x, *a, **k):
     return x
 
@@ -38,9 +45,43 @@ _sentinel = object()
 
 
 def foldr(func, seq, start=_sentinel):
+    items = reversed(seq)
     if start is _sentinel:
-        return foldl(flip(func), reversed(seq))
-    return foldl(flip(func), reversed(seq), start)
+        for acc in items:
+            break
+        else:
+            raise TypeError('foldr() of empty sequence with no initial value')
+    else:
+        acc = start
+    for item in items:
+        acc = func(item, acc)
+    return acc
+
+
+def compose(*funcs):
+    "compose(f, g, h)(x) == f(g(h(x)))"
+    if not funcs:
+        return identity
+    elif len(funcs) == 1:
+        return funcs[0]
+    elif len(funcs) == 2:
+        outer, inner = funcs
+
+        def composed(*args, **kwargs):
+            return outer(inner(*args, **kwargs))
+
+        return composed
+    else:
+        *outers, inner = funcs
+        outers.reverse()
+
+        def composed(*args, **kwargs):
+            result = inner(*args, **kwargs)
+            for outer in outers:
+                result = outer(result)
+            return result
+
+        return composed
 
 
 def rpartial(f, *args, **kwargs):
@@ -48,12 +89,11 @@ def rpartial(f, *args, **kwargs):
 
 
 def pairwise(iterable, *, fillvalue=_sentinel):
-    a, b = tee(iterable)
-    next(b, None)  # advance b by one position
     if fillvalue is _sentinel:
-        return zip(a, b)
+        return _pairwise(iterable)
     else:
-        return zip_longest(a, b, fillvalue=fillvalue)
+        # pair the last item with fillvalue:
+        return _pairwise(chain(iterable, (fillvalue,)))
 
 
 def qualname(fullname):
@@ -70,16 +110,14 @@ def qualname(fullname):
 
 def rotate(iterable):
     iterable = iter(iterable)
-    tmp = next(iterable)
-    yield from iterable
-    yield tmp
+    for first in iterable:
+        yield from iterable
+        yield first
 
 
 def split_pairs(iterable):
     iterable = iter(iterable)
-    for left in iterable:
-        right = next(iterable)
-        yield left, right
+    return zip(iterable, iterable, strict=True)
 
 
 def install_symbols_module(name, factory):
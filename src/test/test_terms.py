@@ -6,6 +6,10 @@ __author__ = 'Mick Krippendorf <m.krippendorf@freenet.de>'
 __license__ = 'MIT'
 
 
+def answers(db, query, variable):
+    return [subst[variable]() for subst in db.ask(query)]
+
+
 def test_builder():
 
     from hornet import build_term
@@ -55,6 +59,302 @@ def test_resolver():
         print(subst)
 
 
+def test_first_argument_index():
+
+    from hornet import Database
+    from hornet.symbols import f, a, b, c, X, Y
+
+    db = Database()
+    db.tell(
+        f(a, 1),
+        f(X, 2),
+        f(b, 3),
+    )
+    db.tell(
+        f(a, 4),
+        f([a], 5),
+    )
+
+    assert answers(db, f(a, Y), Y) == [1, 2, 4]
+    assert answers(db, f(b, Y), Y) == [2, 3]
+    assert answers(db, f(c, Y), Y) == [2]
+    assert answers(db, f([X], Y), Y) == [2, 5]
+    assert answers(db, f(X, Y), Y) == [1, 2, 3, 4, 5]
+
+
+def test_terminal_dcg_rules():
+
+    from hornet import Database, Fact
+    from hornet.terms import Indicator
+    from hornet.symbols import greeting, addressee, X
+
+    db = Database()
+    db.tell(
+        greeting >> ['hello'] & addressee,
+        addressee >> ['world'],
+        addressee >> ['dear', 'reader'],
+    )
+
+    assert all(isinstance(clause, Fact)
+               for clause in db.find_all(Indicator('addressee', 2)))
+    assert answers(db, greeting(X, []), X) == [
+        ['hello', 'world'],
+        ['hello', 'dear', 'reader'],
+    ]
+    assert answers(db, greeting(['hello', 'world', 'again'], X), X) == [
+        ['again'],
+    ]
+
+
+def test_tabling():
+
+    from hornet import Database, let
+    from hornet.terms import Indicator
+    from hornet.symbols import double, edge, path, r, t, a, b, c, d, X, Y, Z
+
+    db = Database()
+    db.tell(
+        edge(a, b),
+        edge(b, c),
+        edge(b, d),
+        path(X, Y) << edge(X, Y),
+        path(X, Y) << edge(X, Z) & path(Z, Y),
+    )
+    db.table(path/2)
+
+    assert answers(db, path(a, Y), Y) == ['b', 'c', 'd']
+    assert len(db.tables[Indicator('path', 2)]) == 4
+    assert answers(db, path(a, Y), Y) == ['b', 'c', 'd']
+    assert answers(db, path(b, Y), Y) == ['c', 'd']
+    assert len(db.tables[Indicator('path', 2)]) == 4
+
+    db.tell(edge(d, a))
+    assert not db.tables[Indicator('path', 2)]
+    assert answers(db, path(c, Y), Y) == []
+
+    db = Database()
+    db.tell(edge(a, b))
+    db.table(edge/2)
+    assert answers(db, edge(a, Y), Y) == ['b']
+    assert answers(db, edge(a, Y), Y) == ['b']
+    assert answers(db, edge(b, Y), Y) == []
+    assert len(db.tables[Indicator('edge', 2)]) == 2
+
+    # a tabled atom reached through a loop of rules:
+    db = Database()
+    db.tell(
+        t << r,
+        r << t,
+        r,
+    )
+    db.table(r/0)
+    assert len(list(db.ask(t))) == 1
+    assert len(list(db.ask(r))) == 1
+
+    # numbers that compare equal are different variants:
+    db = Database()
+    db.tell(double(X, Y) << let(Y, X * 2))
+    db.table(double/2)
+    assert answers(db, double(1, Y), Y) == [2]
+    assert answers(db, double(1.0, Y), Y) == [2.0]
+    assert type(answers(db, double(1.0, Y), Y)[0]) is float
+    assert len(db.tables[Indicator('double', 2)]) == 2
+
+
+def test_table_builtin():
+
+    import pytest
+
+    from hornet import Database, table
+    from hornet.terms import Indicator
+    from hornet.symbols import edge, path, a, b, c, d, X, Y, Z
+
+    db = Database()
+    db.tell(edge(a, b))
+
+    assert list(db.ask(table(edge/2)))
+    assert Indicator('edge', 2) in db.tables
+    assert answers(db, edge(a, Y), Y) == ['b']
+    assert answers(db, edge(a, Y), Y) == ['b']
+    assert len(db.tables[Indicator('edge', 2)]) == 1
+
+    with pytest.raises(TypeError):
+        list(db.ask(table(edge)))
+    with pytest.raises(TypeError):
+        list(db.ask(table(edge/b)))
+    with pytest.raises(TypeError):
+        db.table(edge/b)
+
+    # left recursion:
+    db = Database()
+    db.tell(
+        edge(a, b),
+        edge(b, c),
+        edge(c, d),
+        path(X, Y) << path(X, Z) & edge(Z, Y),
+        path(X, Y) << edge(X, Y),
+    )
+    assert list(db.ask(table(path/2)))
+    assert answers(db, path(a, Y), Y) == ['b', 'c', 'd']
+    assert answers(db, path(c, Y), Y) == ['d']
+    assert all(each.complete
+               for each in db.tables[Indicator('path', 2)].values())
+
+    # right recursion over a cycle:
+    db = Database()
+    db.tell(
+        edge(a, b),
+        edge(b, a),
+        path(X, Y) << edge(X, Y),
+        path(X, Y) << edge(X, Z) & path(Z, Y),
+    )
+    assert list(db.ask(table(path/2)))
+    assert answers(db, path(a, Y), Y) == ['b', 'a']
+    assert answers(db, path(b, Y), Y) == ['a', 'b']
+    assert len(db.tables[Indicator('path', 2)]) == 2
+    assert all(each.complete
+               for each in db.tables[Indicator('path', 2)].values())
+
+
+def test_system_predicate_names():
+
+    from hornet import Database, length
+    from hornet.terms import Indicator
+    from hornet.symbols import a, b, c, X
+
+    db = Database()
+    db.tell(length(a, b, c))
+
+    assert answers(db, length(a, b, X), X) == ['c']
+    assert db.indicators['length'] == {
+        Indicator('length', 2),
+        Indicator('length', 3),
+    }
+    assert sorted(db.indicators['length'])[-1] == Indicator('length', 3)
+    assert Database().indicators['length'] == {Indicator('length', 2)}
+
+
+def test_append_and_reverse():
+
+    from hornet import Database, append, reverse, cut, equal
+    from hornet.symbols import T, X, Y, Z
+
+    db = Database()
+
+    assert answers(db, append([1, 2], [3], X), X) == [[1, 2, 3]]
+    assert answers(db, append([], [3], X), X) == [[3]]
+    assert answers(db, append(X, Y, [1, 2]) & equal(Z, [X, Y]), Z) == [
+        [[], [1, 2]],
+        [[1], [2]],
+        [[1, 2], []],
+    ]
+    assert answers(db, append([1 | T], [2], [1, 2]), T) == [[]]
+    assert answers(db, append([1, 2], Y, [1, 3]), Y) == []
+    assert answers(db, append([1, 2], [3], [1, 2]), X) == []
+    assert answers(db, reverse([1, 2, 3], X), X) == [[3, 2, 1]]
+    assert answers(db, reverse([1, 2], [1, 2]), X) == []
+    assert answers(db, reverse(X, [1, 2]) & cut, X) == [[2, 1]]
+
+
+def test_length():
+
+    from hornet import Database, length, cut
+    from hornet.symbols import N, T
+
+    db = Database()
+
+    assert answers(db, length([1, 2, 3], N), N) == [3]
+    assert answers(db, length([], N), N) == [0]
+    assert len(list(db.ask(length([1, 2, 3], 3)))) == 1
+    assert not list(db.ask(length([1, 2, 3], 2)))
+    assert answers(db, length([1 | T], N) & cut, N) == [1]
+    assert answers(db, length(T, 2), T) == [[None, None]]
+
+
+def test_reserved_helper_names(monkeypatch):
+
+    import hornet
+    from hornet import Database, listing
+    from hornet.terms import Indicator
+    from hornet.symbols import append_partial, a, b, X
+
+    db = Database()
+    db.tell(append_partial(a, b))
+
+    assert Indicator('$append_partial', 3) in db
+    assert answers(db, append_partial(a, X), X) == ['b']
+
+    listed = []
+    monkeypatch.setattr(
+        hornet, '_listing', lambda indicator, clauses: listed.append(indicator))
+    assert list(db.ask(listing))
+    assert Indicator('append', 3) in listed
+    assert Indicator('append_partial', 2) in listed
+    assert not [each for each in listed if each.functor.startswith('$')]
+
+
+def test_arithmetic_comparison():
+
+    import pytest
+
+    from hornet import Database, arithmetic_equal, arithmetic_not_equal, let
+    from hornet.symbols import X, Y
+
+    db = Database()
+
+    assert list(db.ask(let(X, 1) & arithmetic_equal(X + 1, 2)))
+    assert not list(db.ask(let(X, 1) & arithmetic_not_equal(X + 1, 2)))
+
+    with pytest.raises(TypeError):
+        list(db.ask(arithmetic_equal(X, Y)))
+    with pytest.raises(TypeError):
+        list(db.ask(arithmetic_not_equal(X, 1)))
+
+
+def test_let_keeps_equal_numbers_apart():
+
+    from math import copysign
+
+    from hornet import Database, let
+    from hornet.symbols import X
+
+    db = Database()
+
+    assert answers(db, let(X, 0.0), X) == [0.0]
+    [result] = answers(db, let(X, -0.0), X)
+    assert copysign(1, result) == -1
+
+
+def test_copy_shared_subterms():
+
+    import copy
+    import functools
+    import operator
+
+    import hornet.symbols
+    from hornet import Database, equal, findall
+    from hornet.symbols import f, L
+
+    # X0 = f(X1, [X1]), X1 = f(X2, [X2]), ... has 2 ** depth paths to its
+    # innermost variable, so each shared subterm must be copied only once:
+    depth = 12
+    Xs = [getattr(hornet.symbols, f'X{i}') for i in range(depth + 1)]
+    goal = functools.reduce(operator.and_, (
+        equal(X, f(Y, [Y])) for X, Y in zip(Xs, Xs[1:])))
+
+    def assert_shared(term):
+        for _ in range(depth):
+            left, right = term.params
+            assert left.ref is right.ref.car.ref
+            term = left.ref
+
+    db = Database()
+    for subst in db.ask(goal):
+        assert_shared(copy.deepcopy(subst[Xs[0]].ref))
+    for subst in db.ask(findall(Xs[0], goal, L)):
+        assert_shared(subst[L].ref.car.ref)
+
+
 if __name__ == '__main__':
     test_builder()
     test_resolver()
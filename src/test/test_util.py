@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2014 Mick Krippendorf <m.krippendorf@freenet.de>
+
+__version__ = '0.2.5a'
+__date__ = '2014-09-27'
+__author__ = 'Mick Krippendorf <m.krippendorf@freenet.de>'
+__license__ = 'MIT'
+
+
+import pytest
+
+
+def test_compose():
+
+    import toolz
+
+    from hornet.util import compose
+
+    def f(x):
+        return ('f', x)
+
+    def g(x):
+        return ('g', x)
+
+    def h(x, y=0):
+        return ('h', x, y)
+
+    assert compose()(1) == toolz.compose()(1)
+    assert compose(f) is f
+    for funcs in [(f, h), (f, g, h), (g, f, g, h)]:
+        assert compose(*funcs)(1) == toolz.compose(*funcs)(1)
+        assert compose(*funcs)(1, y=2) == toolz.compose(*funcs)(1, y=2)
+
+
+def test_flip():
+
+    import toolz
+
+    from hornet.util import flip, rpartial
+
+    assert flip(divmod)(3, 7) == toolz.flip(divmod)(3, 7) == (2, 1)
+    assert rpartial(divmod, 3)(7) == toolz.flip(divmod, 3)(7) == (2, 1)
+
+
+def test_foldr():
+
+    import functools
+    import toolz
+
+    from hornet.util import foldr
+
+    def old_foldr(func, seq, *start):
+        return functools.reduce(toolz.flip(func), reversed(seq), *start)
+
+    def cons(head, tail):
+        return (head, tail)
+
+    for seq in [[1], [1, 2], [1, 2, 3]]:
+        assert foldr(cons, seq) == old_foldr(cons, seq)
+        assert foldr(cons, seq, ()) == old_foldr(cons, seq, ())
+    assert foldr(cons, [], ()) == old_foldr(cons, [], ()) == ()
+    with pytest.raises(TypeError):
+        old_foldr(cons, [])
+    with pytest.raises(TypeError):
+        foldr(cons, [])
+
+
+def test_pairwise():
+
+    from itertools import tee, zip_longest
+
+    from hornet.util import pairwise
+
+    def old_pairwise(iterable, fillvalue):
+        a, b = tee(iterable)
+        next(b, None)
+        return zip_longest(a, b, fillvalue=fillvalue)
+
+    for items in [[], [1], [1, 2], [1, 2, 3]]:
+        assert list(pairwise(items)) == list(zip(items, items[1:]))
+        assert (list(pairwise(iter(items), fillvalue=0)) ==
+                list(old_pairwise(items, 0)))
+    assert list(pairwise([], fillvalue=0)) == []
+
+
+def test_rotate():
+
+    from hornet.util import rotate
+
+    assert list(rotate([1, 2, 3])) == [2, 3, 1]
+    assert list(rotate([1])) == [1]
+    # this used to raise RuntimeError from the StopIteration of next():
+    assert list(rotate([])) == []
+
+
+def test_split_pairs():
+
+    from hornet.util import split_pairs
+
+    assert list(split_pairs([])) == []
+    assert list(split_pairs([1, 2, 3, 4])) == [(1, 2), (3, 4)]
+    with pytest.raises(ValueError):
+        list(split_pairs([1, 2, 3]))